@@ -1,16 +1,79 @@
-from sqlmodel import create_engine, SQLModel, Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from sqlmodel import bindparam, create_engine, select, SQLModel, Session, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .config import settings
+from .models import SourceData
+from .validators import TYPED_VALUE_COLUMNS, typed_values
 
 sqlite_url = f"sqlite:///{settings.db_path}"
 engine = create_engine(sqlite_url, echo=True, connect_args={'check_same_thread': False})
 
+# The routers use the async engine, so that a query does not block the event loop.
+# The sync engine above is used for the schema setup at startup, and by scripts and tests.
+async_sqlite_url = f"sqlite+aiosqlite:///{settings.db_path}"
+async_engine = create_async_engine(async_sqlite_url, echo=True, poolclass=AsyncAdaptedQueuePool)
+
 
 def create_db():
     with Session(engine) as session:
         session.execute("PRAGMA foreign_keys=ON")
         SQLModel.metadata.create_all(engine)
+    added_columns = add_missing_columns()
+    if any(column in added_columns.get(SourceData.__tablename__, []) for column in TYPED_VALUE_COLUMNS):
+        backfill_typed_values()
+
+
+'''
+    Additive migration:
+        - create_all creates the missing tables, but does not add new columns or indexes to existing tables.
+        - Add the nullable columns of the models which are missing in the database, and the missing indexes.
+        - Returns the added columns by table name.
+'''
+def add_missing_columns() -> dict:
+    added = {}
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise Exception(f"Can not add the non nullable column {table.name}.{column.name} without a server default")
+                column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}')
+                added.setdefault(table.name, []).append(column.name)
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+    return added
 
 
-def get_session():
+'''
+    Backfill the typed copies of SourceData.value for the rows written before they existed.
+'''
+def backfill_typed_values(batch_size: int = 5000):
+    statement = (
+        select(SourceData.id, SourceData.value_type, SourceData.value)
+        .where(SourceData.value_type != "str")
+        .order_by(SourceData.id)
+    )
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        last_id = 0
+        while True:
+            rows = session.execute(statement.where(SourceData.id > last_id).limit(batch_size)).all()
+            if len(rows) == 0:
+                break
+            session.execute(
+                update(SourceData.__table__).where(SourceData.__table__.c.id == bindparam("row_id")),
+                [{"row_id": row.id, **typed_values(row.value_type, row.value)} for row in rows],
+            )
+            session.commit()
+            last_id = rows[-1].id
+
+
+async def get_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,50 @@
+from enum import Enum
+
+
+'''
+    DataDisplayType: How the data should be displayed on the UI.
+'''
+class DataDisplayType(str, Enum):
+    slider = "slider"
+    picklist = "picklist"
+    text = "text"
+    float = "float"
+    boolean = "boolean"
+    integer = "integer"
+
+
+'''
+    SupportedDataTypes: What does the data represent. Can be expanded by adding more relevant types.
+'''
+class SupportedDataTypes(str, Enum):
+    tillage_depth = "tillage_depth"
+    crop_type = "crop_type"
+    comments = "comments"
+    tilled = "tilled"
+    external_account_id = "external_account_id"
+    # Other data types which can be added in future.
+    
+
+'''
+    CropType: Supported crop types. Can be expanded by adding more relevant types.
+'''
+class CropType(str, Enum):
+    corn = "corn"
+    soybean = "soybean"
+    wheat = "wheat"
+    hops = "hops"
+    # Other crop types which can be added in future.
+
+
+'''
+    SupportedValueTypes: 
+        - What is the actual type of the value.
+        - Keeping this as we will store the value as string in the database.
+'''
+class SupportedValueTypes(str, Enum):
+    int = "int"
+    float = "float"
+    str = "str"
+    bool = "bool"
+    date = "date"
+    datetime = "datetime"
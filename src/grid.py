@@ -0,0 +1,69 @@
+from typing import AsyncIterator, List
+
+from sqlalchemy import and_, case, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models import CustomerDisplayConfiguration, DisplayColumn, SourceData
+
+
+'''
+    Grid:
+        - Builds the tabular view of a CustomerDisplayConfiguration in the database (see readme, steps 1-7).
+        - Each row is a (year, crop_cycle) combination, sorted in descending order.
+        - Each cell is the SourceData value whose data_type matches the DisplayColumn at that position.
+'''
+
+
+'''
+    Get the active display columns of a configuration, ordered by column_order.
+'''
+async def get_active_columns(db: AsyncSession, display_config_id: int) -> List[DisplayColumn]:
+    statement = (
+        select(DisplayColumn)
+        .where(DisplayColumn.customer_display_configuration_id == display_config_id)
+        .where(DisplayColumn.is_active == True)
+        .order_by(DisplayColumn.column_order, DisplayColumn.id)
+    )
+    results = await db.execute(statement)
+    return list(i[0] for i in results.all())
+
+
+'''
+    Single pass statement for the grid.
+        - source_data is joined with the active display columns on data_type, so only the data types which
+          are part of the layout are read.
+        - Rows are grouped by (year, crop_cycle) and every column becomes a conditional aggregate
+          MAX(CASE WHEN display_column.id = <column id> THEN source_data.value END).
+'''
+def grid_statement(config: CustomerDisplayConfiguration, columns: List[DisplayColumn]):
+    cells = [
+        func.max(case((DisplayColumn.id == column.id, SourceData.value))).label(f"column_{index}")
+        for index, column in enumerate(columns)
+    ]
+    return (
+        select(SourceData.year, SourceData.crop_cycle, *cells)
+        .join(
+            DisplayColumn,
+            and_(
+                DisplayColumn.data_type == SourceData.data_type,
+                DisplayColumn.customer_display_configuration_id == config.id,
+                DisplayColumn.is_active == True,
+            ),
+        )
+        .where(SourceData.customer_id == config.customer_id)
+        .where(SourceData.year.between(config.start_year, config.end_year))
+        .group_by(SourceData.year, SourceData.crop_cycle)
+        .order_by(SourceData.year.desc(), SourceData.crop_cycle.desc())
+    )
+
+
+'''
+    Iterate the grid rows as tuples of (year, crop_cycle, cell_1, cell_2, ...).
+    Rows are fetched lazily from the cursor, so the whole grid is never held in memory.
+'''
+async def iter_grid_rows(db: AsyncSession, config: CustomerDisplayConfiguration, columns: List[DisplayColumn]) -> AsyncIterator[tuple]:
+    if len(columns) == 0:
+        return
+    results = await db.stream(grid_statement(config, columns))
+    async for row in results:
+        yield tuple(row)
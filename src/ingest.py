@@ -0,0 +1,186 @@
+import csv
+import json
+from typing import AsyncIterator, List, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models import SourceData
+from src.validators import validate_source_rows
+
+
+'''
+    Bulk ingestion of SourceData
+        - The request body is read as a stream of records (NDJSON or CSV), so the whole file is never held in memory.
+        - Records are validated in chunks, a column at a time (see src/validators.py).
+        - Valid records of a chunk are inserted with a single executemany, in one transaction per chunk.
+        - Invalid records are reported back with their position and do not fail the load.
+'''
+
+SUPPORTED_FORMATS = ["ndjson", "csv"]
+
+# Content types which can be mapped to a format, when the format is not passed explicitly.
+CONTENT_TYPE_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+
+
+class RowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkIngestReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[RowError] = []
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    return CONTENT_TYPE_FORMATS.get(content_type.split(";")[0].strip().lower())
+
+
+'''
+    Error message of a failed validation or insert.
+        - Model validators raise plain exceptions with the message as the first argument.
+        - Pydantic validation errors are flattened into "field: message" pairs.
+'''
+def error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+    if isinstance(e, DBAPIError):
+        return str(e.orig)
+    return str(e.args[0]) if e.args else e.__class__.__name__
+
+
+'''
+    Split a stream of bytes into text lines, without reading the whole stream.
+'''
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    pending = b""
+    async for chunk in stream:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8")
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8")
+
+
+'''
+    Parse records from the lines of the request body.
+        - Yields (row number, record or exception) so that a malformed line is reported and skipped.
+        - For csv, the first line is the header, and a quoted value can span multiple lines.
+'''
+async def iter_records(lines: AsyncIterator[str], format: str):
+    row = 0
+    if format == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise Exception("Row should be a json object")
+                yield row, record
+            except Exception as e:
+                yield row, e
+        return
+
+    header = None
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        # An odd number of quotes means a quoted value continues on the next line.
+        if pending.count('"') % 2 == 1:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, Exception(f"Expected {len(header)} values, got {len(values)}")
+        else:
+            yield row, dict(zip(header, values))
+    if pending:
+        yield row + 1, Exception("Unterminated quoted value")
+
+
+'''
+    Validate a chunk of records with the batch validators, which give the same errors as the SourceData model validators.
+    Returns the valid rows (as column values) with their row numbers, and appends the errors to the report.
+'''
+def validate_chunk(chunk: list, report: BulkIngestReport) -> List[tuple]:
+    parsed = []
+    for row, record in chunk:
+        if isinstance(record, Exception):
+            report.failed += 1
+            report.errors.append(RowError(row=row, error=error_message(record)))
+        else:
+            parsed.append((row, record))
+
+    valid = []
+    for (row, _), (values, error) in zip(parsed, validate_source_rows([record for _, record in parsed])):
+        if error is not None:
+            report.failed += 1
+            report.errors.append(RowError(row=row, error=error))
+        else:
+            valid.append((row, values))
+    return valid
+
+
+'''
+    Insert the validated rows of a chunk in one transaction with a single executemany.
+        - If the chunk fails as a whole (eg: a row refers to a customer which does not exist),
+          the rows are retried one by one so that only the offending rows are reported.
+'''
+async def insert_chunk(db: AsyncSession, rows: List[tuple], report: BulkIngestReport):
+    if len(rows) == 0:
+        return
+    try:
+        await db.execute(insert(SourceData), [values for _, values in rows])
+        await db.commit()
+        report.inserted += len(rows)
+        return
+    except DBAPIError:
+        await db.rollback()
+
+    for row, values in rows:
+        try:
+            await db.execute(insert(SourceData), values)
+            await db.commit()
+            report.inserted += 1
+        except DBAPIError as e:
+            await db.rollback()
+            report.failed += 1
+            report.errors.append(RowError(row=row, error=error_message(e)))
+
+
+'''
+    Ingest a stream of records chunk by chunk.
+'''
+async def ingest(db: AsyncSession, records, chunk_size: int) -> BulkIngestReport:
+    report = BulkIngestReport()
+    chunk = []
+    async for row, record in records:
+        chunk.append((row, record))
+        if len(chunk) >= chunk_size:
+            await insert_chunk(db, validate_chunk(chunk, report), report)
+            chunk = []
+    await insert_chunk(db, validate_chunk(chunk, report), report)
+    report.errors.sort(key=lambda error: error.row)
+    return report
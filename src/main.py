@@ -8,6 +8,7 @@ from .routers.users import router as users_router
 from .routers.customers import router as customers_router
 from .routers.customerDisplayConfigurations import router as customer_display_config_router
 from .routers.displayColumns import router as display_columns_router
+from .routers.sourceData import router as source_data_router
 
 
 app = FastAPI()
@@ -29,4 +30,5 @@ app.include_router(users_router)
 app.include_router(customers_router)
 app.include_router(customer_display_config_router)
 app.include_router(display_columns_router)
+app.include_router(source_data_router)
 
@@ -1,64 +1,22 @@
 import re
 from typing import Optional, List, Union
-from datetime import datetime, date
+from datetime import datetime
 
 from sqlmodel import Column, Field, SQLModel
-from enum import Enum
 from sqlmodel import SQLModel, Field
-from sqlalchemy import JSON, Enum as SQLAlchemyEnum
+from sqlalchemy import JSON, Enum as SQLAlchemyEnum, Index, event
 from pydantic import validator
 
-
-
-MIN_YEAR = 1980
-
-'''
-    DataDisplayType: How the data should be displayed on the UI.
-'''
-class DataDisplayType(str, Enum):
-    slider = "slider"
-    picklist = "picklist"
-    text = "text"
-    float = "float"
-    boolean = "boolean"
-    integer = "integer"
-
-
-'''
-    SupportedDataTypes: What does the data represent. Can be expanded by adding more relevant types.
-'''
-class SupportedDataTypes(str, Enum):
-    tillage_depth = "tillage_depth"
-    crop_type = "crop_type"
-    comments = "comments"
-    tilled = "tilled"
-    external_account_id = "external_account_id"
-    # Other data types which can be added in future.
-    
-
-'''
-    CropType: Supported crop types. Can be expanded by adding more relevant types.
-'''
-class CropType(str, Enum):
-    corn = "corn"
-    soybean = "soybean"
-    wheat = "wheat"
-    hops = "hops"
-    # Other crop types which can be added in future.
-
-
-'''
-    SupportedValueTypes: 
-        - What is the actual type of the value.
-        - Keeping this as we will store the value as string in the database.
-'''
-class SupportedValueTypes(str, Enum):
-    int = "int"
-    float = "float"
-    str = "str"
-    bool = "bool"
-    date = "date"
-    datetime = "datetime"
+from src.enums import CropType, DataDisplayType, SupportedDataTypes, SupportedValueTypes
+from src.validators import (
+    MIN_YEAR,
+    current_year,
+    validate_crop_cycle,
+    validate_data_options,
+    validate_source_value,
+    validate_year,
+    typed_values,
+)
 
 
 '''
@@ -100,7 +58,7 @@ class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     email: str
-    customer_id: int = Field(foreign_key="customer.id")
+    customer_id: int = Field(foreign_key="customer.id", index=True)
     # Other user fields...
 
     created_at: datetime = Field(default_factory=datetime.now)
@@ -133,7 +91,7 @@ class User(SQLModel, table=True):
 class CustomerDisplayConfiguration(SQLModel, table=True):
     __tablename__ = "customer_display_configuration"
     id: Optional[int] = Field(default=None, primary_key=True)
-    customer_id: int = Field(foreign_key="customer.id")
+    customer_id: int = Field(foreign_key="customer.id", index=True)
     display_name: str = Field(description="Display name of the configuration, like a heading of a presentation.")
     is_default: bool = Field(default=False, description="Is this the default configuration. May be used when a user logs in.")
     is_active: bool = Field(default=True, description="Is this configuration active")
@@ -154,7 +112,7 @@ class CustomerDisplayConfiguration(SQLModel, table=True):
 
     @validator("start_year")
     def validate_start_year(cls, value):
-        if value < MIN_YEAR or value > date.today().year - 1:
+        if value < MIN_YEAR or value > current_year() - 1:
             raise Exception(f"Start year should be between {MIN_YEAR} and previous year") 
         return value  
 
@@ -163,7 +121,7 @@ class CustomerDisplayConfiguration(SQLModel, table=True):
         if value < values["start_year"]:
             raise Exception("End year should be greater than start year.") 
         
-        if value < MIN_YEAR or value > date.today().year:
+        if value < MIN_YEAR or value > current_year():
             raise Exception(f"End year should be between {MIN_YEAR} and current year inclusive.") 
         return value
 
@@ -187,6 +145,10 @@ class CustomerDisplayConfiguration(SQLModel, table=True):
 '''
 class DisplayColumn(SQLModel, table=True):
     __tablename__ = "display_column"
+    __table_args__ = (
+        # Columns of a configuration are read in column_order.
+        Index("ix_display_column_configuration_order", "customer_display_configuration_id", "column_order"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     customer_display_configuration_id: int = Field( foreign_key= "customer_display_configuration.id", description="The display configuration this column belongs to")
     column_label: str = Field(description="Label of the column")
@@ -208,29 +170,7 @@ class DisplayColumn(SQLModel, table=True):
     
     @validator("data_options")
     def validate_data_options(cls, value, values):
-        if values["data_display_type"] == DataDisplayType.slider:
-            # Slider options should be [min, max, step] and should be string representation of float values
-            if len(value) != 3:
-                raise Exception("Slider options should be [min, max, step]")
-            try:
-                items = [float(item) for item in value]
-            except:
-                raise Exception("Slider options should be float values in string format")
-            
-            if values["data_type"] == SupportedDataTypes.tillage_depth:
-                if items[0] < 0 or items[1] > 10 or items[2] <= 0:
-                    raise Exception("Slider options for tillage depth should be [0, 10, step] where step > 0")
-                
-        if values["data_display_type"] == DataDisplayType.picklist:
-            # Picklist options should be a non empty list of strings
-            if len(value) == 0:
-                raise Exception("Picklist options should not be empty")
-            
-            if values["data_type"] == SupportedDataTypes.crop_type:
-                for val in value:
-                    if val not in CropType.__members__:
-                        raise Exception("Picklist options should be one of the crop types")
-        return value
+        return validate_data_options(values.get("data_display_type"), values.get("data_type"), value)
     
     @validator("column_order")
     def validate_column_order(cls, value):
@@ -250,16 +190,31 @@ class DisplayColumn(SQLModel, table=True):
 '''
 class SourceData(SQLModel, table=True):
     __tablename__ = "source_data"
+    __table_args__ = (
+        # Grid and range reads of a customer filter by year and group by (year, crop_cycle).
+        Index("ix_source_data_customer_year", "customer_id", "year", "crop_cycle", "data_type"),
+        Index("ix_source_data_value_num", "customer_id", "data_type", "value_num"),
+        Index("ix_source_data_value_bool", "customer_id", "data_type", "value_bool"),
+        Index("ix_source_data_value_date", "customer_id", "data_type", "value_date"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     customer_id: int = Field(foreign_key="customer.id")
 
     year: int = Field(description="Year of the data")
     crop_cycle: int = Field(description="Crop cycle of the data")
 
+    # data_type is declared before value, as validate_value depends on it.
+    data_type: SupportedDataTypes = Field(description="What does this data represent. Example: tillage_depth, crop_type, etc.")
+
     value_type: SupportedValueTypes = Field(default=SupportedValueTypes.str, description="Actual type of the value, like int, float, str, bool, date, datetime")
     value: str = Field(description="Data value in string representation")
 
-    data_type: SupportedDataTypes = Field(description="What does this data represent. Example: tillage_depth, crop_type, etc.")
+    # Typed copies of the value, set from value_type on every write (see set_typed_values).
+    # Indexed, so that filters like "tillage_depth > 6" run in sql instead of parsing every value.
+    value_num: Optional[float] = Field(default=None, description="Value of int and float value types")
+    value_bool: Optional[bool] = Field(default=None, description="Value of bool value type")
+    value_date: Optional[datetime] = Field(default=None, description="Value of date and datetime value types")
+
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -269,45 +224,26 @@ class SourceData(SQLModel, table=True):
     
     @validator("year")
     def validate_year(cls, value):
-        if value < MIN_YEAR or value > date.today().year:
-            raise Exception(f"Year should be between {MIN_YEAR} and current year inclusive.") 
-        return value
+        return validate_year(value)
 
     @validator("crop_cycle")
     def validate_crop_cycle(cls, value):
-        if value < 1:
-            raise Exception("Crop cycle should be greater that 0.") 
-        return value
+        return validate_crop_cycle(value)
     
     @validator("value")
     def validate_value(cls, value, values):
+        # data_type is absent from values when it failed its own validation, which is reported instead.
+        if "data_type" not in values:
+            return value
+        return validate_source_value(values["data_type"], value)
 
-        if values["data_type"] == SupportedDataTypes.tillage_depth:
-            # Tillage depth should be between 0 and 10
-            value = float(value)
-            if value < 0 or value >= 10:
-                raise Exception("Tillage depth should be between 0 (inclusive) and 10 ")
-            
-        elif values["data_type"] == SupportedDataTypes.crop_type:
-            # Crop type should be one of the supported crop types
-            if value not in CropType.__members__:
-                raise Exception("Invalid crop type")
-            
-        elif values["data_type"] == SupportedDataTypes.tilled:
-            # Tilled should be a boolean value. As we are storing it as string, we need to validate it for one of the true/false values.
-            if value.lower() not in ["True", "False", "true", "false", "1", "0"]:
-                raise Exception("Invalid value for tilled")
-            
-        elif values["data_type"] == SupportedDataTypes.external_account_id:
-            # External account id should be alphanumeric
-            if len(value) == 0:
-                raise Exception("External account id should not be empty")
-            if not re.match(r"^[a-zA-Z0-9_]*$", value):
-                raise Exception("External account id must be alphanumeric.")
-
-        else:
-            return str(value)
-
-        return str(value)
 
-    
+'''
+    Keep the typed copies of SourceData.value in sync on every ORM insert and update.
+    Bulk inserts with core statements set them with validators.typed_values.
+'''
+@event.listens_for(SourceData, "before_insert")
+@event.listens_for(SourceData, "before_update")
+def set_typed_values(mapper, connection, target: SourceData):
+    for key, value in typed_values(target.value_type, target.value).items():
+        setattr(target, key, value)
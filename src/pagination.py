@@ -0,0 +1,63 @@
+from typing import Optional
+
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+'''
+    Pagination of the list apis
+        - Keyset pagination on id: a page is "WHERE id > :after ORDER BY id LIMIT :limit", which is a
+          search on the primary key however deep the page is.
+        - limit: Page size. Without it the whole list is returned.
+        - after: Cursor, the id of the last row of the previous page.
+        - The cursor of the next page is returned in the X-Next-Cursor header, when the page is full.
+        - stream: Stream the list as a json array, read from a server side cursor, so the memory used
+          does not depend on the size of the list.
+'''
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 500
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+        after: Optional[int] = Query(default=None, description="Id of the last row of the previous page"),
+        stream: bool = Query(default=False, description="Stream the rows as a json array"),
+    ):
+        self.limit = limit
+        self.after = after
+        self.stream = stream
+
+
+def paginate(statement, id_column, page: PageParams):
+    if page.after is not None:
+        statement = statement.where(id_column > page.after)
+    statement = statement.order_by(id_column)
+    if page.limit is not None:
+        statement = statement.limit(page.limit)
+    return statement
+
+
+def set_next_cursor(response: Response, results: list, page: PageParams):
+    if page.limit is not None and len(results) == page.limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(results[-1].id)
+
+
+'''
+    Stream the rows of a select statement of a model as a json array.
+'''
+def stream_json_array(db: AsyncSession, statement) -> StreamingResponse:
+    async def generate():
+        results = await db.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        yield "["
+        index = 0
+        async for row in results.scalars():
+            yield ("," if index > 0 else "") + row.json()
+            index += 1
+        yield "]"
+
+    return StreamingResponse(generate(), media_type="application/json")
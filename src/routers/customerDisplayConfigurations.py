@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from src.db_internal import get_session
+from src.grid import get_active_columns, iter_grid_rows
 from src.models import CustomerDisplayConfiguration
+from src.pagination import PageParams, paginate, set_next_cursor, stream_json_array
 from pydantic import BaseModel, ValidationError
 from typing import Optional
 
@@ -39,26 +45,30 @@ class CreateCustomerDisplayConfigurationRequest(BaseModel):
     Create a customer display configuration with the above request object.
 '''
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=CustomerDisplayConfiguration)
-async def create_display_config(display_config: CreateCustomerDisplayConfigurationRequest, db: Session = Depends(get_session)):
+async def create_display_config(display_config: CreateCustomerDisplayConfigurationRequest, db: AsyncSession = Depends(get_session)):
     try:
         display_config = CustomerDisplayConfiguration.from_orm(display_config)
         db.add(display_config)
-        db.commit()
-        db.refresh(display_config)
+        await db.commit()
+        await db.refresh(display_config)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=e.args[0])
     return display_config
 
 
 '''
     Get all display configurations.
+        - Paginated with limit and after, or streamed with stream=true (see src/pagination.py)
 '''
 @router.get("/", response_model=list[CustomerDisplayConfiguration])
-async def get_all_display_configs(db: Session = Depends(get_session)):
-    statement = select(CustomerDisplayConfiguration)
-    results = db.execute(statement)
+async def get_all_display_configs(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_session)):
+    statement = paginate(select(CustomerDisplayConfiguration), CustomerDisplayConfiguration.id, page)
+    if page.stream:
+        return stream_json_array(db, statement)
+    results = await db.execute(statement)
     results = list(i[0] for i in results.all())
+    set_next_cursor(response, results, page)
 
     if len(results) == 0:
         return []
@@ -69,23 +79,57 @@ async def get_all_display_configs(db: Session = Depends(get_session)):
     Get a display configuration by id.
 '''
 @router.get("/{display_config_id}", response_model=CustomerDisplayConfiguration)
-async def get_display_config_by_id(display_config_id: int, db: Session = Depends(get_session)):
-    display_cofig = db.get(CustomerDisplayConfiguration, display_config_id)
+async def get_display_config_by_id(display_config_id: int, db: AsyncSession = Depends(get_session)):
+    display_cofig = await db.get(CustomerDisplayConfiguration, display_config_id)
     if not display_cofig:
         raise HTTPException(status_code=404, detail="display_config_id not found")
     return display_cofig
 
 
+'''
+    Get the grid (tabular view) of a display configuration.
+        - The grid is computed by the database in a single grouped query (see src/grid.py)
+        - The rows are streamed back as they are read from the cursor.
+        - Example:
+            {
+                "columns": [{"id": 1, "column_label": "Tillage Depth", "column_order": 1, "data_type": "tillage_depth", ...}],
+                "rows": [
+                    {"year": 2022, "crop_cycle": 2, "values": ["4.5"]},
+                    {"year": 2022, "crop_cycle": 1, "values": [null]}
+                ]
+            }
+'''
+@router.get("/{display_config_id}/grid")
+async def get_display_config_grid(display_config_id: int, db: AsyncSession = Depends(get_session)):
+    display_config = await db.get(CustomerDisplayConfiguration, display_config_id)
+    if not display_config:
+        raise HTTPException(status_code=404, detail="display_config_id not found")
+    columns = await get_active_columns(db, display_config_id)
+
+    async def generate():
+        yield '{"columns": ['
+        yield ", ".join(column.json(exclude={"created_at", "updated_at"}) for column in columns)
+        yield '], "rows": ['
+        index = 0
+        async for row in iter_grid_rows(db, display_config, columns):
+            prefix = ", " if index > 0 else ""
+            index += 1
+            yield prefix + json.dumps({"year": row[0], "crop_cycle": row[1], "values": list(row[2:])})
+        yield "]}"
+
+    return StreamingResponse(generate(), media_type="application/json")
+
+
 '''
     Delete a display configuration by id.
 '''
 @router.delete("/{display_config_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_display_config_by_id(display_config_id: int, db: Session = Depends(get_session)):
-    display_cofig = db.get(CustomerDisplayConfiguration, display_config_id)
+async def delete_display_config_by_id(display_config_id: int, db: AsyncSession = Depends(get_session)):
+    display_cofig = await db.get(CustomerDisplayConfiguration, display_config_id)
     if not display_cofig:
         raise HTTPException(status_code=404, detail="display_config_id not found")
-    db.delete(display_cofig)
-    db.commit()
+    await db.delete(display_cofig)
+    await db.commit()
     return
 
 
@@ -107,9 +151,9 @@ class UpdateCustomerDisplayConfigurationRequest(BaseModel):
     Update a display configuration by id
 '''
 @router.put("/{display_config_id}", status_code=status.HTTP_200_OK, response_model=CustomerDisplayConfiguration)
-async def update_display_config_by_id(display_config_id: int, update_config_data: UpdateCustomerDisplayConfigurationRequest, db: Session = Depends(get_session)):
+async def update_display_config_by_id(display_config_id: int, update_config_data: UpdateCustomerDisplayConfigurationRequest, db: AsyncSession = Depends(get_session)):
     try:
-        row = db.get(CustomerDisplayConfiguration, display_config_id)
+        row = await db.get(CustomerDisplayConfiguration, display_config_id)
         if not row:
             raise HTTPException(status_code=404, detail="display_config_id not found")
         
@@ -121,10 +165,10 @@ async def update_display_config_by_id(display_config_id: int, update_config_data
         # validate the row with the updated values.
         CustomerDisplayConfiguration.validate(row.dict())
 
-        db.commit()
-        db.refresh(row)
+        await db.commit()
+        await db.refresh(row)
         return row
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=e.args[0])
 
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 
 from src.db_internal import get_session
 from src.models import Customer
+from src.pagination import PageParams, paginate, set_next_cursor, stream_json_array
 
 
 router = APIRouter(prefix="/customers", tags=["Customer"])
@@ -25,11 +27,18 @@ class CustomerCreateRequest(BaseModel):
     is_active: bool
 
 
+'''
+    Get all customers.
+        - Paginated with limit and after, or streamed with stream=true (see src/pagination.py)
+'''
 @router.get("/", response_model=list[Customer])
-async def get_customers(db: Session = Depends(get_session)):
-    statement = select(Customer)
-    results = db.execute(statement)
+async def get_customers(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_session)):
+    statement = paginate(select(Customer), Customer.id, page)
+    if page.stream:
+        return stream_json_array(db, statement)
+    results = await db.execute(statement)
     results = list(i[0] for i in results.all())
+    set_next_cursor(response, results, page)
 
     if len(results) == 0:
         return []
@@ -37,23 +46,23 @@ async def get_customers(db: Session = Depends(get_session)):
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=Customer)
-async def create_customer(customer_details: CustomerCreateRequest, db: Session = Depends(get_session)):
+async def create_customer(customer_details: CustomerCreateRequest, db: AsyncSession = Depends(get_session)):
     try:
         customer = Customer.from_orm(customer_details)
         db.add(customer)
-        db.commit()
-        db.refresh(customer)
+        await db.commit()
+        await db.refresh(customer)
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=e.args[0])
     return customer
 
 
 @router.delete("/{customer_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_customer(customer_id: int, db: Session = Depends(get_session)):
-    row = db.get(Customer, customer_id)
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_session)):
+    row = await db.get(Customer, customer_id)
     if not row:
         raise HTTPException(status_code=404, detail="customer_id not found")
-    db.delete(row)
-    db.commit()
+    await db.delete(row)
+    await db.commit()
     return
\ No newline at end of file
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from src.db_internal import get_session
 from src.models import DisplayColumn, SupportedDataTypes, DataDisplayType, CropType
+from src.pagination import PageParams, paginate, set_next_cursor, stream_json_array
 from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 
@@ -41,26 +43,31 @@ class CreateDisplayColumnRequest(BaseModel):
     Create a customer display column with the above request object.
 '''
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=DisplayColumn)
-async def create_display_column(display_column: CreateDisplayColumnRequest, db: Session = Depends(get_session)):
+async def create_display_column(display_column: CreateDisplayColumnRequest, db: AsyncSession = Depends(get_session)):
     try:
         display_column = DisplayColumn.from_orm(display_column)
         db.add(display_column)
-        db.commit()
-        db.refresh(display_column)
+        await db.commit()
+        await db.refresh(display_column)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=e.args[0])
     return display_column
 
 
 '''
     Get all display columns for a customer display configuration.
+        - Paginated with limit and after, or streamed with stream=true (see src/pagination.py)
 '''
 @router.get("/customer-config/{customer_display_config_id}", response_model=list[DisplayColumn])
-async def get_display_columns_for_customer_display_config(customer_display_config_id: int, db: Session = Depends(get_session)):
+async def get_display_columns_for_customer_display_config(customer_display_config_id: int, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_session)):
     statement = select(DisplayColumn).where(DisplayColumn.customer_display_configuration_id == customer_display_config_id)
-    results = db.execute(statement)
+    statement = paginate(statement, DisplayColumn.id, page)
+    if page.stream:
+        return stream_json_array(db, statement)
+    results = await db.execute(statement)
     results = list(i[0] for i in results.all())
+    set_next_cursor(response, results, page)
 
     if len(results) == 0:
         return []
@@ -91,9 +98,9 @@ class UpdateDisplayColumnRequest(BaseModel):
         }
 '''
 @router.put("/{display_column_id}", status_code=status.HTTP_200_OK, response_model=DisplayColumn)
-async def update_display_column(display_column_id: int, update_col_data: UpdateDisplayColumnRequest, db: Session = Depends(get_session)):
+async def update_display_column(display_column_id: int, update_col_data: UpdateDisplayColumnRequest, db: AsyncSession = Depends(get_session)):
     try:
-        row = db.get(DisplayColumn, display_column_id)
+        row = await db.get(DisplayColumn, display_column_id)
         if not row:
             raise HTTPException(status_code=404, detail="display_column_id not found")
 
@@ -104,11 +111,11 @@ async def update_display_column(display_column_id: int, update_col_data: UpdateD
         # Validate the rows with model validators
         DisplayColumn.validate(row)
 
-        db.commit()
-        db.refresh(row)
+        await db.commit()
+        await db.refresh(row)
         return row
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=e.args[0])
     
 
@@ -116,10 +123,10 @@ async def update_display_column(display_column_id: int, update_col_data: UpdateD
     Delete a customer display column.
 '''
 @router.delete("/{display_column_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_display_column(display_column_id: int, db: Session = Depends(get_session)):
-    row = db.get(DisplayColumn, display_column_id)
+async def delete_display_column(display_column_id: int, db: AsyncSession = Depends(get_session)):
+    row = await db.get(DisplayColumn, display_column_id)
     if not row:
         raise HTTPException(status_code=404, detail="display_column_id not found")
-    db.delete(row)
-    db.commit()
+    await db.delete(row)
+    await db.commit()
     return
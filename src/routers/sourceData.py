@@ -0,0 +1,102 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.db_internal import get_session
+from src.ingest import BulkIngestReport, SUPPORTED_FORMATS, detect_format, ingest, iter_lines, iter_records
+from src.models import SourceData, SupportedDataTypes
+from src.pagination import PageParams, paginate, set_next_cursor, stream_json_array
+from typing import Optional
+
+
+router = APIRouter(prefix="/source-data", tags=["Source Data"])
+
+
+'''
+    Bulk load source data from a streamed NDJSON or CSV body.
+        - format: "ndjson" or "csv". Detected from the Content-Type header when not passed.
+        - chunk_size: Number of rows validated and inserted per transaction.
+        - NDJSON example (one json object per line):
+            {"customer_id": 1, "year": 2021, "crop_cycle": 1, "data_type": "tillage_depth", "value_type": "float", "value": "4.5"}
+            {"customer_id": 1, "year": 2021, "crop_cycle": 1, "data_type": "crop_type", "value": "corn"}
+        - CSV example (first line is the header):
+            customer_id,year,crop_cycle,data_type,value_type,value
+            1,2021,1,tillage_depth,float,4.5
+        - Response contains the number of inserted and failed rows, and an error for every failed row.
+'''
+@router.post("/bulk", status_code=status.HTTP_200_OK, response_model=BulkIngestReport)
+async def bulk_create_source_data(
+    request: Request,
+    format: Optional[str] = Query(default=None, description="ndjson or csv"),
+    chunk_size: int = Query(default=1000, ge=1, le=50000),
+    db: AsyncSession = Depends(get_session),
+):
+    format = format or detect_format(request.headers.get("content-type"))
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format should be one of {SUPPORTED_FORMATS}")
+
+    records = iter_records(iter_lines(request.stream()), format)
+    return await ingest(db, records, chunk_size)
+
+
+'''
+    Get the source data of a customer.
+        - Filters on the value are applied in sql on its typed copy (value_num, value_bool, value_date),
+          so only the rows with a matching value_type are returned.
+        - eg: years where the tillage depth was more than 6:
+            /source-data/?customer_id=1&data_type=tillage_depth&value_gt=6
+        - Paginated with limit and after, or streamed with stream=true (see src/pagination.py)
+'''
+@router.get("/", response_model=list[SourceData])
+async def get_source_data(
+    response: Response,
+    customer_id: int,
+    data_type: Optional[SupportedDataTypes] = None,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    crop_cycle: Optional[int] = None,
+    value_gt: Optional[float] = Query(default=None, description="Numeric value greater than"),
+    value_gte: Optional[float] = Query(default=None, description="Numeric value greater than or equal to"),
+    value_lt: Optional[float] = Query(default=None, description="Numeric value less than"),
+    value_lte: Optional[float] = Query(default=None, description="Numeric value less than or equal to"),
+    value_bool: Optional[bool] = Query(default=None, description="Boolean value"),
+    date_from: Optional[datetime] = Query(default=None, description="Date value on or after"),
+    date_to: Optional[datetime] = Query(default=None, description="Date value on or before"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_session),
+):
+    statement = select(SourceData).where(SourceData.customer_id == customer_id)
+    if data_type is not None:
+        statement = statement.where(SourceData.data_type == data_type)
+    if start_year is not None:
+        statement = statement.where(SourceData.year >= start_year)
+    if end_year is not None:
+        statement = statement.where(SourceData.year <= end_year)
+    if crop_cycle is not None:
+        statement = statement.where(SourceData.crop_cycle == crop_cycle)
+
+    if value_gt is not None:
+        statement = statement.where(SourceData.value_num > value_gt)
+    if value_gte is not None:
+        statement = statement.where(SourceData.value_num >= value_gte)
+    if value_lt is not None:
+        statement = statement.where(SourceData.value_num < value_lt)
+    if value_lte is not None:
+        statement = statement.where(SourceData.value_num <= value_lte)
+    if value_bool is not None:
+        statement = statement.where(SourceData.value_bool == value_bool)
+    if date_from is not None:
+        statement = statement.where(SourceData.value_date >= date_from)
+    if date_to is not None:
+        statement = statement.where(SourceData.value_date <= date_to)
+
+    statement = paginate(statement, SourceData.id, page)
+    if page.stream:
+        return stream_json_array(db, statement)
+    results = await db.execute(statement)
+    results = list(i[0] for i in results.all())
+    set_next_cursor(response, results, page)
+
+    if len(results) == 0:
+        return []
+    return results
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from src.db_internal import get_session
 from src.models import User
+from src.pagination import PageParams, paginate, set_next_cursor, stream_json_array
 from pydantic import BaseModel
 
 
@@ -14,11 +16,18 @@ class UserCreateRequest(BaseModel):
     customer_id: int
 
 
+'''
+    Get all users.
+        - Paginated with limit and after, or streamed with stream=true (see src/pagination.py)
+'''
 @router.get("/", response_model=list[User])
-async def get_users(db: Session = Depends(get_session)):
-    statement = select(User)
-    results = db.execute(statement)
+async def get_users(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_session)):
+    statement = paginate(select(User), User.id, page)
+    if page.stream:
+        return stream_json_array(db, statement)
+    results = await db.execute(statement)
     results = list(i[0] for i in results.all())
+    set_next_cursor(response, results, page)
 
     if len(results) == 0:
         return []
@@ -26,23 +35,23 @@ async def get_users(db: Session = Depends(get_session)):
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(user_id: int, db: Session = Depends(get_session)):
-    row = db.get(User, user_id)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_session)):
+    row = await db.get(User, user_id)
     if not row:
         raise HTTPException(status_code=404, detail="user_id not found")
-    db.delete(row)
-    db.commit()
+    await db.delete(row)
+    await db.commit()
     return
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=User)
-async def create_user(user: UserCreateRequest, db: Session = Depends(get_session)):
+async def create_user(user: UserCreateRequest, db: AsyncSession = Depends(get_session)):
     try:
         user = User.from_orm(user)
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=e.args[0])
     return user
\ No newline at end of file
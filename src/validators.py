@@ -0,0 +1,341 @@
+import re
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.enums import CropType, DataDisplayType, SupportedDataTypes, SupportedValueTypes
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the batch validators fall back to plain python loops.
+    np = None
+
+
+'''
+    Validators:
+        - Validation rules of the models, compiled once at import time.
+        - SourceData.validate_value and DisplayColumn.validate_data_options delegate to this module, so
+          a value is validated the same way for a single row and for a batch of rows.
+        - Errors are plain exceptions with the message as the first argument, like the model validators.
+'''
+
+MIN_YEAR = 1980
+
+CROP_TYPES = frozenset(CropType.__members__)
+BOOLEAN_VALUES = frozenset(["true", "false", "1", "0"])
+EXTERNAL_ACCOUNT_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_]*$")
+
+TILLAGE_DEPTH_MIN = 0
+TILLAGE_DEPTH_MAX = 10
+
+
+'''
+    Current year, cached until the end of the year.
+    Avoids a date.today() call for every validated row.
+'''
+_current_year = {"year": 0, "until": 0.0}
+
+
+def current_year() -> int:
+    now = time.time()
+    if now >= _current_year["until"]:
+        year = date.today().year
+        _current_year["year"] = year
+        _current_year["until"] = datetime(year + 1, 1, 1).timestamp()
+    return _current_year["year"]
+
+
+'''
+    Value validators of SourceData, one per SupportedDataTypes.
+        - Take the value in string representation and return the value to be stored.
+        - Data types without a validator are stored as is.
+'''
+def validate_tillage_depth(value: str) -> str:
+    # Tillage depth should be between 0 and 10
+    value = float(value)
+    if value < TILLAGE_DEPTH_MIN or value >= TILLAGE_DEPTH_MAX:
+        raise Exception("Tillage depth should be between 0 (inclusive) and 10 ")
+    return str(value)
+
+
+def validate_crop_type(value: str) -> str:
+    # Crop type should be one of the supported crop types
+    if value not in CROP_TYPES:
+        raise Exception("Invalid crop type")
+    return str(value)
+
+
+def validate_tilled(value: str) -> str:
+    # Tilled should be a boolean value. As we are storing it as string, we need to validate it for one of the true/false values.
+    if value.lower() not in BOOLEAN_VALUES:
+        raise Exception("Invalid value for tilled")
+    return str(value)
+
+
+def validate_external_account_id(value: str) -> str:
+    # External account id should be alphanumeric
+    if len(value) == 0:
+        raise Exception("External account id should not be empty")
+    if not EXTERNAL_ACCOUNT_ID_PATTERN.match(value):
+        raise Exception("External account id must be alphanumeric.")
+    return str(value)
+
+
+SOURCE_VALUE_VALIDATORS: Dict[SupportedDataTypes, Callable[[str], str]] = {
+    SupportedDataTypes.tillage_depth: validate_tillage_depth,
+    SupportedDataTypes.crop_type: validate_crop_type,
+    SupportedDataTypes.tilled: validate_tilled,
+    SupportedDataTypes.external_account_id: validate_external_account_id,
+}
+
+
+def validate_source_value(data_type: SupportedDataTypes, value: str) -> str:
+    validator = SOURCE_VALUE_VALIDATORS.get(data_type)
+    if validator is None:
+        return str(value)
+    return validator(value)
+
+
+def validate_year(value: int) -> int:
+    if value < MIN_YEAR or value > current_year():
+        raise Exception(f"Year should be between {MIN_YEAR} and current year inclusive.")
+    return value
+
+
+def validate_crop_cycle(value: int) -> int:
+    if value < 1:
+        raise Exception("Crop cycle should be greater that 0.")
+    return value
+
+
+'''
+    Typed values of SourceData:
+        - The value is stored as a string, value_type tells what it actually is.
+        - The typed copy of the value goes to value_num (int, float), value_bool (bool) or value_date (date, datetime)
+          so that filters on the value can run in sql.
+        - A value which can not be parsed as its value_type has no typed copy.
+'''
+TYPED_VALUE_COLUMNS = ["value_num", "value_bool", "value_date"]
+
+
+def typed_values(value_type: SupportedValueTypes, value: str) -> dict:
+    typed = {"value_num": None, "value_bool": None, "value_date": None}
+    try:
+        if value_type in (SupportedValueTypes.int, SupportedValueTypes.float):
+            typed["value_num"] = float(value)
+        elif value_type == SupportedValueTypes.bool:
+            if value.lower() in BOOLEAN_VALUES:
+                typed["value_bool"] = value.lower() in ("true", "1")
+        elif value_type == SupportedValueTypes.date:
+            parsed = date.fromisoformat(value)
+            typed["value_date"] = datetime(parsed.year, parsed.month, parsed.day)
+        elif value_type == SupportedValueTypes.datetime:
+            typed["value_date"] = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    return typed
+
+
+'''
+    Validate the data_options of a DisplayColumn for its data_display_type and data_type.
+        - For slider: [min, max, step] as string representation of float values
+        - For picklist: a non empty list, of crop types for the crop_type data type
+'''
+def validate_data_options(data_display_type: DataDisplayType, data_type: SupportedDataTypes, value: List[str]) -> List[str]:
+    if data_display_type == DataDisplayType.slider:
+        # Slider options should be [min, max, step] and should be string representation of float values
+        if len(value) != 3:
+            raise Exception("Slider options should be [min, max, step]")
+        try:
+            items = [float(item) for item in value]
+        except (TypeError, ValueError):
+            raise Exception("Slider options should be float values in string format")
+
+        if data_type == SupportedDataTypes.tillage_depth:
+            if items[0] < TILLAGE_DEPTH_MIN or items[1] > TILLAGE_DEPTH_MAX or items[2] <= 0:
+                raise Exception("Slider options for tillage depth should be [0, 10, step] where step > 0")
+
+    if data_display_type == DataDisplayType.picklist:
+        # Picklist options should be a non empty list of strings
+        if len(value) == 0:
+            raise Exception("Picklist options should not be empty")
+
+        if data_type == SupportedDataTypes.crop_type:
+            if not CROP_TYPES.issuperset(value):
+                raise Exception("Picklist options should be one of the crop types")
+    return value
+
+
+'''
+    Batch validators:
+        - Validate a whole column of values at once, and return (values, errors) where errors[i] is
+          the exception raised for the value at position i (None for a valid value).
+        - Like in the model validators, a ValueError is a type error and a plain Exception is a failed rule.
+        - The range checks of numeric values are vectorized with numpy when it is installed.
+'''
+def _range_errors(numbers: Sequence[float], low: float, high: float, high_inclusive: bool) -> List[bool]:
+    if np is not None and len(numbers) > 0:
+        array = np.asarray(numbers, dtype=float)
+        outside = (array < low) | ((array > high) if high_inclusive else (array >= high))
+        return outside.tolist()
+    if high_inclusive:
+        return [number < low or number > high for number in numbers]
+    return [number < low or number >= high for number in numbers]
+
+
+def validate_years(values: Sequence[int]) -> Tuple[List[int], List[Optional[Exception]]]:
+    error = Exception(f"Year should be between {MIN_YEAR} and current year inclusive.")
+    outside = _range_errors(values, MIN_YEAR, current_year(), high_inclusive=True)
+    return list(values), [error if failed else None for failed in outside]
+
+
+def validate_crop_cycles(values: Sequence[int]) -> Tuple[List[int], List[Optional[Exception]]]:
+    error = Exception("Crop cycle should be greater that 0.")
+    outside = _range_errors(values, 1, float("inf"), high_inclusive=True)
+    return list(values), [error if failed else None for failed in outside]
+
+
+def _validate_tillage_depths(values: Sequence[str]) -> Tuple[List[str], List[Optional[Exception]]]:
+    try:
+        numbers = list(map(float, values))
+        errors = [None] * len(values)
+    except (TypeError, ValueError):
+        # At least one value is not a number, parse them one by one to find out which.
+        numbers, errors = [], []
+        for value in values:
+            try:
+                numbers.append(float(value))
+                errors.append(None)
+            except (TypeError, ValueError) as e:
+                numbers.append(0.0)
+                errors.append(e)
+
+    outside = _range_errors(numbers, TILLAGE_DEPTH_MIN, TILLAGE_DEPTH_MAX, high_inclusive=False)
+    error = Exception("Tillage depth should be between 0 (inclusive) and 10 ")
+    results = []
+    for index, number in enumerate(numbers):
+        if errors[index] is None and outside[index]:
+            errors[index] = error
+        results.append(str(number))
+    return results, errors
+
+
+def validate_source_values(data_type: SupportedDataTypes, values: Sequence[str]) -> Tuple[List[str], List[Optional[Exception]]]:
+    if data_type == SupportedDataTypes.tillage_depth:
+        return _validate_tillage_depths(values)
+
+    validator = SOURCE_VALUE_VALIDATORS.get(data_type, str)
+    results, errors = [], []
+    for value in values:
+        try:
+            results.append(validator(value))
+            errors.append(None)
+        except Exception as e:
+            results.append(value)
+            errors.append(e)
+    return results, errors
+
+
+'''
+    Validate a batch of SourceData records (dicts as received from a client).
+        - Returns one (row, error) pair per record: the column values of a valid record, or the error of an invalid one.
+        - Gives the same error as SourceData.validate: the first failing model validator in field order,
+          otherwise the type errors as "field: message" pairs.
+'''
+SOURCE_ROW_FIELDS = ["customer_id", "year", "crop_cycle", "data_type", "value_type", "value"]
+
+
+def _coerce_int(value) -> int:
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.strip()):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+    raise ValueError("value is not a valid integer")
+
+
+def _coerce_str(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(value)
+    raise ValueError("str type expected")
+
+
+def _coerce_enum(enum):
+    message = "value is not a valid enumeration member; permitted: " + ", ".join(f"'{member.value}'" for member in enum)
+
+    def coerce(value):
+        try:
+            return enum(value)
+        except ValueError:
+            raise ValueError(message)
+    return coerce
+
+
+SOURCE_ROW_COERCERS = {
+    "customer_id": _coerce_int,
+    "year": _coerce_int,
+    "crop_cycle": _coerce_int,
+    "data_type": _coerce_enum(SupportedDataTypes),
+    "value_type": _coerce_enum(SupportedValueTypes),
+    "value": _coerce_str,
+}
+
+
+def validate_source_rows(records: Sequence[dict]) -> List[Tuple[Optional[dict], Optional[str]]]:
+    now = datetime.now()
+    rows, type_errors = [], []
+    for record in records:
+        row, errors = {}, []
+        for field in SOURCE_ROW_FIELDS:
+            if field not in record:
+                if field == "value_type":
+                    row[field] = SupportedValueTypes.str
+                else:
+                    errors.append(f"{field}: field required")
+                continue
+            if record[field] is None:
+                errors.append(f"{field}: none is not an allowed value")
+                continue
+            try:
+                row[field] = SOURCE_ROW_COERCERS[field](record[field])
+            except ValueError as e:
+                errors.append(f"{field}: {e.args[0]}")
+        rows.append(row)
+        type_errors.append(errors)
+
+    # Model validators, a column at a time.
+    custom_errors: List[Optional[str]] = [None] * len(rows)
+
+    def apply(field: str, validate_column, indexes: List[int]):
+        values, errors = validate_column([rows[index][field] for index in indexes])
+        for index, value, error in zip(indexes, values, errors):
+            rows[index][field] = value
+            if isinstance(error, (TypeError, ValueError)):
+                type_errors[index].append(f"{field}: {error}")
+            elif error is not None and custom_errors[index] is None:
+                custom_errors[index] = str(error.args[0])
+
+    apply("year", validate_years, [index for index, row in enumerate(rows) if "year" in row])
+    apply("crop_cycle", validate_crop_cycles, [index for index, row in enumerate(rows) if "crop_cycle" in row])
+
+    by_data_type: Dict[SupportedDataTypes, List[int]] = {}
+    for index, row in enumerate(rows):
+        if "data_type" in row and "value" in row:
+            by_data_type.setdefault(row["data_type"], []).append(index)
+    for data_type, indexes in by_data_type.items():
+        apply("value", lambda values: validate_source_values(data_type, values), indexes)
+
+    results = []
+    for row, errors, custom_error in zip(rows, type_errors, custom_errors):
+        if custom_error is not None:
+            results.append((None, custom_error))
+        elif errors:
+            results.append((None, "; ".join(errors)))
+        else:
+            row.update(typed_values(row["value_type"], row["value"]))
+            row["created_at"] = now
+            row["updated_at"] = now
+            results.append((row, None))
+    return results
@@ -1,7 +1,12 @@
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlmodel import Session, insert
 
+from src import validators
+from src.db_internal import engine
+from src.ingest import error_message
 from src.main import app
+from src.models import SourceData
 
 
 '''
@@ -170,4 +175,172 @@ def update_display_column(client, display_column_id: int) -> dict:
 
 def delete_display_column(client, display_column_id: int):
     response = client.delete(f"/display-column/{display_column_id}")
-    assert response.status_code == status.HTTP_204_NO_CONTENT
\ No newline at end of file
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+'''
+    Test the grid of a customer display config
+        - Source data is pivoted into (year, crop_cycle) rows in descending order
+        - Cells follow the column_order of the active display columns
+'''
+def test_display_config_grid():
+    with TestClient(app) as client:
+        customer_id = create_customer(client)["id"]
+        response = client.post("/customer-display-config/", json={"customer_id": customer_id, "display_name": "grid", "is_default": True, "is_active": True, "start_year": 2015, "end_year": 2022})
+        display_config_id = response.json()["id"]
+        for column in [
+            {"column_label": "Crop Type", "column_order": 2, "data_type": "crop_type", "data_display_type": "picklist", "data_options": ["corn", "wheat"], "is_active": True},
+            {"column_label": "Tillage Depth", "column_order": 1, "data_type": "tillage_depth", "data_display_type": "slider", "data_options": ["0", "10", "1"], "is_active": True},
+            {"column_label": "Comments", "column_order": 3, "data_type": "comments", "data_display_type": "text", "data_options": [], "is_active": False},
+        ]:
+            response = client.post("/display-column/", json={"customer_display_configuration_id": display_config_id, **column})
+            assert response.status_code == status.HTTP_201_CREATED
+
+        insert_source_data(customer_id, [
+            (2020, 1, "tillage_depth", "float", "4.5"),
+            (2020, 1, "crop_type", "str", "corn"),
+            (2021, 1, "crop_type", "str", "wheat"),
+            (2021, 1, "comments", "str", "hail"),
+            (2010, 1, "crop_type", "str", "hops"),
+        ])
+
+        response = client.get(f"/customer-display-config/{display_config_id}/grid")
+        assert response.status_code == status.HTTP_200_OK
+        grid = response.json()
+        assert [column["column_label"] for column in grid["columns"]] == ["Tillage Depth", "Crop Type"]
+        assert grid["rows"] == [
+            {"year": 2021, "crop_cycle": 1, "values": [None, "wheat"]},
+            {"year": 2020, "crop_cycle": 1, "values": ["4.5", "corn"]},
+        ]
+
+        response = client.get("/customer-display-config/999999/grid")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+'''
+    Test the bulk load of source data
+        - Valid rows are inserted, invalid rows are reported without failing the load
+        - Both ndjson and csv bodies are supported
+'''
+def test_bulk_create_source_data():
+    with TestClient(app) as client:
+        customer_id = create_customer(client)["id"]
+        body = "\n".join([
+            f'{{"customer_id": {customer_id}, "year": 2021, "crop_cycle": 1, "data_type": "tillage_depth", "value_type": "float", "value": "4.5"}}',
+            f'{{"customer_id": {customer_id}, "year": 2021, "crop_cycle": 1, "data_type": "tillage_depth", "value": "40"}}',
+            "not json",
+            '{"customer_id": 999999, "year": 2021, "crop_cycle": 1, "data_type": "crop_type", "value": "corn"}',
+            f'{{"customer_id": {customer_id}, "year": 2021, "crop_cycle": 2, "data_type": "crop_type", "value": "corn"}}',
+        ])
+        response = client.post("/source-data/bulk?chunk_size=2", content=body, headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["inserted"] == 2
+        assert report["failed"] == 3
+        assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+
+        body = "\n".join([
+            "customer_id,year,crop_cycle,data_type,value_type,value",
+            f"{customer_id},2020,1,comments,str,\"hail, then\nreplant\"",
+            f"{customer_id},1900,1,tilled,bool,true",
+        ])
+        response = client.post("/source-data/bulk?format=csv", content=body)
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["inserted"] == 1
+        assert report["errors"][0]["row"] == 2
+
+        response = client.post("/source-data/bulk", content=body)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+'''
+    Test the keyset pagination and the streaming of the list apis
+'''
+def test_list_pagination_and_streaming():
+    with TestClient(app) as client:
+        customer_ids = [create_customer(client)["id"] for _ in range(3)]
+
+        response = client.get(f"/customers/?limit=2&after={customer_ids[0] - 1}")
+        assert response.status_code == status.HTTP_200_OK
+        assert [customer["id"] for customer in response.json()] == customer_ids[:2]
+        assert response.headers["x-next-cursor"] == str(customer_ids[1])
+
+        response = client.get(f"/customers/?limit=2&after={response.headers['x-next-cursor']}")
+        assert [customer["id"] for customer in response.json()] == customer_ids[2:]
+        assert "x-next-cursor" not in response.headers
+
+        response = client.get(f"/customers/?stream=true&after={customer_ids[0]}")
+        assert response.status_code == status.HTTP_200_OK
+        assert [customer["id"] for customer in response.json()] == customer_ids[1:]
+        assert response.json()[0]["name"] == "customer 1"
+
+        response = client.get("/customers/?limit=0")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+'''
+    Test the filters on the typed values of source data
+'''
+def test_get_source_data_typed_filters():
+    with TestClient(app) as client:
+        customer_id = create_customer(client)["id"]
+        body = "\n".join([
+            "customer_id,year,crop_cycle,data_type,value_type,value",
+            f"{customer_id},2019,1,tillage_depth,float,7.5",
+            f"{customer_id},2020,1,tillage_depth,float,4",
+            f"{customer_id},2021,1,tillage_depth,float,6",
+            f"{customer_id},2021,1,tilled,bool,True",
+            f"{customer_id},2020,1,tilled,bool,false",
+        ])
+        response = client.post("/source-data/bulk?format=csv", content=body)
+        assert response.json()["inserted"] == 5
+
+        response = client.get(f"/source-data/?customer_id={customer_id}&data_type=tillage_depth&value_gte=6")
+        assert response.status_code == status.HTTP_200_OK
+        assert [(row["year"], row["value_num"]) for row in response.json()] == [(2019, 7.5), (2021, 6.0)]
+
+        response = client.get(f"/source-data/?customer_id={customer_id}&data_type=tilled&value_bool=true")
+        assert [row["year"] for row in response.json()] == [2021]
+
+
+'''
+    Test that the batch validators give the same results as the SourceData model validators
+'''
+def test_batch_validation_matches_model_validators(monkeypatch):
+    records = [
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "tillage_depth", "value": "4"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "tillage_depth", "value": "10"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "tillage_depth", "value": "deep"},
+        {"customer_id": "1", "year": "2020", "crop_cycle": "2", "data_type": "crop_type", "value": "corn"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "crop_type", "value": "rice"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "tilled", "value": "TRUE"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "tilled", "value": "yes"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "external_account_id", "value": ""},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "external_account_id", "value": "a-b"},
+        {"customer_id": 1, "year": 2020, "crop_cycle": 1, "data_type": "comments", "value": 12},
+        {"customer_id": 1, "year": 1900, "crop_cycle": 0, "data_type": "crop_type", "value": "rice"},
+        {"customer_id": "x", "year": 2020, "crop_cycle": 0, "data_type": "crop_type", "value": "corn"},
+        {"customer_id": "x", "data_type": "rainfall", "value_type": "decimal", "value": "1"},
+    ]
+    for numpy in [validators.np, None]:
+        monkeypatch.setattr(validators, "np", numpy)
+        for record, (row, error) in zip(records, validators.validate_source_rows(records)):
+            try:
+                expected = SourceData.validate(record).dict(exclude={"id", "created_at", "updated_at"})
+                assert error is None
+                assert {key: row[key] for key in expected} == expected
+            except AssertionError:
+                raise
+            except Exception as e:
+                assert row is None
+                assert error == error_message(e)
+
+
+# Source Data
+def insert_source_data(customer_id: int, rows: list):
+    with Session(engine) as session:
+        session.execute(insert(SourceData), [
+            {"customer_id": customer_id, "year": year, "crop_cycle": crop_cycle, "data_type": data_type, "value_type": value_type, "value": value}
+            for year, crop_cycle, data_type, value_type, value in rows
+        ])
+        session.commit()
@@ -0,0 +1,82 @@
+import re
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.db_internal import engine
+from src.main import app
+
+
+'''
+    Query plan regression tests
+        - Every api is called once while the sql statements sent to the database are recorded.
+        - Each recorded statement with a WHERE clause is explained with EXPLAIN QUERY PLAN.
+        - A statement which scans a whole table (instead of searching an index) fails the test.
+        - Statements without a WHERE clause (eg: listing all the customers) are full scans by design and are skipped.
+'''
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+@pytest.fixture
+def recorded_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and re.search(r"\bWHERE\b", statement) and not statement.lstrip().upper().startswith(("PRAGMA", "INSERT", "EXPLAIN")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def call_all_apis(client: TestClient):
+    customer_id = client.post("/customers/", json={"name": "plans", "is_active": True}).json()["id"]
+    client.get("/customers/")
+    client.get(f"/customers/?limit=10&after={customer_id - 1}")
+
+    user_id = client.post("/users/", json={"name": "plans", "email": "plans@bar.com", "customer_id": customer_id}).json()["id"]
+    client.get("/users/")
+    client.get(f"/users/?limit=10&after={user_id - 1}&stream=true")
+
+    response = client.post("/customer-display-config/", json={"customer_id": customer_id, "display_name": "plans", "is_default": True, "is_active": True, "start_year": 2015, "end_year": 2022})
+    display_config_id = response.json()["id"]
+    client.get("/customer-display-config/")
+    client.get(f"/customer-display-config/{display_config_id}")
+
+    response = client.post("/display-column/", json={"customer_display_configuration_id": display_config_id, "column_label": "Tillage Depth", "column_order": 1, "is_active": True, "data_type": "tillage_depth", "data_display_type": "slider", "data_options": ["0", "10", "1"]})
+    display_column_id = response.json()["id"]
+    client.get(f"/display-column/customer-config/{display_config_id}")
+
+    body = f'{{"customer_id": {customer_id}, "year": 2020, "crop_cycle": 1, "data_type": "tillage_depth", "value_type": "float", "value": "6.5"}}'
+    client.post("/source-data/bulk?format=ndjson", content=body)
+    client.get(f"/source-data/?customer_id={customer_id}&start_year=2015&end_year=2022")
+    client.get(f"/source-data/?customer_id={customer_id}&data_type=tillage_depth&value_gt=6")
+    client.get(f"/source-data/?customer_id={customer_id}&data_type=tilled&value_bool=true")
+    client.get(f"/customer-display-config/{display_config_id}/grid")
+
+    client.put(f"/customer-display-config/{display_config_id}", json={"is_default": False})
+    client.put(f"/display-column/{display_column_id}", json={"is_active": False})
+    client.delete(f"/display-column/{display_column_id}")
+    client.delete(f"/customer-display-config/{display_config_id}")
+    client.delete(f"/users/{user_id}")
+    return customer_id
+
+
+def test_no_full_table_scans(recorded_statements):
+    with TestClient(app) as client:
+        call_all_apis(client)
+
+    assert len(recorded_statements) > 0
+    full_scans = []
+    with engine.connect() as connection:
+        for statement, parameters in list(recorded_statements):
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            for row in plan:
+                match = FULL_SCAN.match(row.detail)
+                if match and match.group(1) != "CONSTANT":
+                    full_scans.append(f"{row.detail}: {' '.join(statement.split())}")
+    assert full_scans == []